@@ -4,15 +4,21 @@ Statistical analysis and visualization module for DDW research trends.
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')  # figures are only written to files, never shown
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import seaborn as sns
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import logging
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from scipy import stats
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+from functools import cached_property
 
 from src.config import (
     PROCESSED_DATA_DIR,
@@ -34,9 +40,98 @@ class TrendAnalyzer:
         Args:
             data (pd.DataFrame): Processed abstract data
         """
-        self.data = data
+        # Work on a copy so the caller's frame keeps its dtypes
+        self.data = data.copy()
         self.covid_date = datetime.strptime(COVID_START_DATE, '%Y-%m-%d')
         
+        # Reuse the dates parsed by process_abstracts, parsing them only when absent
+        if not ('date' in self.data and pd.api.types.is_datetime64_any_dtype(self.data['date'])):
+            self.data['date'] = pd.to_datetime(
+                self.data['presentation_date'], format='%Y-%m-%d', cache=True, errors='coerce'
+            )
+        
+        # Every analysis is placed in time, so abstracts without a valid date
+        # are left out; this keeps 'year' a plain integer column, whose values
+        # come back from to_dict() as Python ints
+        undated = self.data['date'].isna()
+        if undated.any():
+            logger.warning(f"Skipping {undated.sum()} abstracts without a valid presentation date")
+            self.data = self.data[~undated].copy()
+        self.data['year'] = self.data['date'].dt.year.astype('int16')
+        
+        # Group on integer category codes rather than hashing strings
+        for column in ('research_category', 'geography'):
+            self.data[column] = self.data[column].astype('category')
+        self._geo_codes = self.data['geography'].cat.codes.to_numpy()
+        self._geo_labels = self.data['geography'].cat.categories
+        
+        # The COVID flag is 0/1, so one byte per row is enough
+        self.data['contains_covid'] = self.data['contains_covid'].astype('int8')
+        
+        # Build the yearly grouping once and reuse it across analyses and plots
+        self._year_gb = self.data.groupby('year')
+        
+    @cached_property
+    def _daily(self) -> pd.DataFrame:
+        """
+        Daily COVID-related and total abstract counts, shared by the COVID analyses.
+        
+        Returns:
+            pd.DataFrame: 'sum' and 'count' of contains_covid for every day in range
+        """
+        return self.data.groupby(pd.Grouper(key='date', freq='D'))['contains_covid'].agg(['sum', 'count'])
+    
+    @cached_property
+    def _yearly_counts(self) -> pd.Series:
+        """
+        Number of abstracts per year, shared by the analyses and plots.
+        
+        Returns:
+            pd.Series: Abstract count indexed by year
+        """
+        return self._year_gb['abstract'].count()
+    
+    @cached_property
+    def _covid_by_year(self) -> pd.Series:
+        """
+        Number of COVID-related abstracts per year, shared by the analyses and plots.
+        
+        Returns:
+            pd.Series: Sum of contains_covid indexed by year
+        """
+        return self._year_gb['contains_covid'].sum()
+    
+    @cached_property
+    def _category_by_year(self) -> pd.DataFrame:
+        """
+        Abstract counts per year and research category.
+        
+        Returns:
+            pd.DataFrame: Counts with years as rows and observed categories as columns
+        """
+        return (
+            self.data.groupby(['year', 'research_category'], observed=True)
+            .size()
+            .unstack(fill_value=0)
+        )
+    
+    @cached_property
+    def _geo_counts(self) -> pd.Series:
+        """
+        Abstract counts per geography, most frequent first.
+        
+        Returns:
+            pd.Series: Counts of the geographies present in the data
+        """
+        # Count geographies straight from their codes (-1 marks missing values),
+        # listing only geographies present, as the per-year distributions do
+        geo_counts = pd.Series(
+            np.bincount(self._geo_codes[self._geo_codes >= 0], minlength=len(self._geo_labels)),
+            index=self._geo_labels,
+            name='count'
+        )
+        return geo_counts[geo_counts > 0].sort_values(ascending=False, kind='stable')
+    
     def analyze_temporal_trends(self) -> Dict:
         """
         Analyze trends over time.
@@ -44,16 +139,27 @@ class TrendAnalyzer:
         Returns:
             Dict: Dictionary containing temporal analysis results
         """
-        # Convert presentation_date to datetime
-        self.data['date'] = pd.to_datetime(self.data['presentation_date'])
-        
         # Group by year and calculate metrics
-        yearly_stats = self.data.groupby(self.data['date'].dt.year).agg({
-            'abstract': 'count',
-            'contains_covid': 'sum',
-            'research_category': lambda x: x.value_counts().to_dict(),
-            'geography': lambda x: x.value_counts().to_dict()
-        }).reset_index()
+        yearly_stats = pd.DataFrame({
+            'abstract': self._yearly_counts,
+            'contains_covid': self._covid_by_year
+        })
+        
+        # Per-year category and geography distributions, listing only the
+        # values present in each year (most frequent first). One grouping
+        # pass counts every combination; each column is then a small sum.
+        joint_counts = self.data.groupby(
+            ['year', 'research_category', 'geography'], observed=True, dropna=False
+        ).size()
+        for column in ('research_category', 'geography'):
+            counts = joint_counts.groupby(level=['year', column], observed=True).sum()
+            counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+            yearly_stats[column] = pd.Series({
+                year: year_counts.droplevel('year').to_dict()
+                for year, year_counts in counts.groupby(level='year')
+            })
+        
+        yearly_stats = yearly_stats.reset_index()
         
         # Calculate year-over-year changes
         yearly_stats['yoy_change'] = yearly_stats['abstract'].pct_change()
@@ -67,21 +173,22 @@ class TrendAnalyzer:
         Returns:
             Dict: Dictionary containing COVID-19 impact analysis
         """
-        # Split data into pre and post COVID periods
-        pre_covid = self.data[self.data['date'] < self.covid_date]
-        post_covid = self.data[self.data['date'] >= self.covid_date]
+        # Split the shared daily totals into pre and post COVID periods
+        pre_days = self._daily.index < self.covid_date
+        pre_totals = self._daily[pre_days].sum()
+        post_totals = self._daily[~pre_days].sum()
         
         # Perform statistical tests
         stats_results = {
-            'pre_covid_count': len(pre_covid),
-            'post_covid_count': len(post_covid),
-            'covid_related_percentage': (post_covid['contains_covid'].sum() / len(post_covid)) * 100
+            'pre_covid_count': int(pre_totals['count']),
+            'post_covid_count': int(post_totals['count']),
+            'covid_related_percentage': (post_totals['sum'] / post_totals['count']) * 100
         }
         
         # Compare research categories
         category_comparison = self._compare_distributions(
-            pre_covid['research_category'],
-            post_covid['research_category']
+            self.data.loc[self.data['date'] < self.covid_date, 'research_category'],
+            self.data.loc[self.data['date'] >= self.covid_date, 'research_category']
         )
         
         stats_results['category_changes'] = category_comparison
@@ -96,99 +203,166 @@ class TrendAnalyzer:
             Dict: Dictionary containing geographical analysis
         """
         # Calculate overall distribution
-        geo_dist = self.data['geography'].value_counts()
+        geo_dist = self._geo_counts
         
         # Calculate temporal changes in distribution
-        yearly_geo = self.data.groupby([self.data['date'].dt.year, 'geography']).size().unstack()
+        yearly_geo = self.data.groupby(['year', 'geography'], observed=True).size().unstack()
         
         return {
             'overall_distribution': geo_dist.to_dict(),
             'temporal_changes': yearly_geo.to_dict()
         }
     
-    def create_visualizations(self):
-        """Create and save visualizations of the analysis results."""
-        # Set style
-        plt.style.use('seaborn')
-        sns.set_palette(COLOR_PALETTE)
-        
-        # 1. Temporal trends plot
-        self._plot_temporal_trends()
+    def create_visualizations(self, figures_dir: Optional[Path] = None):
+        """
+        Create and save visualizations of the analysis results.
         
-        # 2. Research category distribution
-        self._plot_category_distribution()
+        Args:
+            figures_dir (Path, optional): Output directory, defaults to FIGURES_DIR
+        """
+        figures_dir = Path(figures_dir) if figures_dir is not None else FIGURES_DIR
         
-        # 3. COVID-19 impact visualization
-        self._plot_covid_impact()
+        # Fill the cached aggregates here, before the plotters read them from
+        # several threads at once
+        for aggregate in ('_yearly_counts', '_covid_by_year', '_category_by_year', '_geo_counts', '_daily'):
+            getattr(self, aggregate)
         
-        # 4. Geographical distribution
-        self._plot_geographical_distribution()
+        # Set style
+        matplotlib.style.use('seaborn')
+        sns.set_palette(COLOR_PALETTE)
         
-        # 5. Interactive trends dashboard
-        self._create_interactive_dashboard()
+        static_plotters = [
+            self._plot_temporal_trends,          # 1. Temporal trends plot
+            self._plot_category_distribution,    # 2. Research category distribution
+            self._plot_covid_impact              # 3. COVID-19 impact visualization
+        ]
+        plotly_plotters = [
+            self._plot_geographical_distribution,  # 4. Geographical distribution
+            self._create_interactive_dashboard     # 5. Interactive trends dashboard
+        ]
+        
+        # Plotly serializes figures in Python and imports its JSON encoder lazily
+        # (which is not safe to race across threads), so its figures are written
+        # here while the matplotlib figures render on worker threads
+        if FIGURE_FORMAT == 'html':
+            plotly_plotters = static_plotters + plotly_plotters
+            static_plotters = []
+        
+        with ThreadPoolExecutor(max_workers=max(len(static_plotters), 1)) as executor:
+            futures = [executor.submit(plotter, figures_dir) for plotter in static_plotters]
+            for plotter in plotly_plotters:
+                plotter(figures_dir)
+            for future in futures:
+                future.result()
     
-    def _plot_temporal_trends(self):
+    def _plot_temporal_trends(self, figures_dir: Path):
         """Create and save temporal trends visualization."""
-        plt.figure(figsize=(12, 6))
-        
         # Plot total abstracts per year
-        yearly_counts = self.data.groupby(self.data['date'].dt.year)['abstract'].count()
-        
-        plt.plot(yearly_counts.index, yearly_counts.values, marker='o')
-        plt.title('Number of DDW Abstracts Over Time')
-        plt.xlabel('Year')
-        plt.ylabel('Number of Abstracts')
-        plt.grid(True)
+        yearly_counts = self._yearly_counts
+        
+        if FIGURE_FORMAT == 'html':
+            fig = go.Figure(go.Scatter(
+                x=yearly_counts.index,
+                y=yearly_counts.values,
+                mode='lines+markers'
+            ))
+            fig.update_layout(
+                title='Number of DDW Abstracts Over Time',
+                xaxis_title='Year',
+                yaxis_title='Number of Abstracts'
+            )
+            fig.write_html(str(figures_dir / 'temporal_trends.html'))
+            return
+        
+        fig = Figure(figsize=(12, 6))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        ax.plot(yearly_counts.index, yearly_counts.values, marker='o')
+        ax.set_title('Number of DDW Abstracts Over Time')
+        ax.set_xlabel('Year')
+        ax.set_ylabel('Number of Abstracts')
+        ax.grid(True)
         
         # Save plot
-        plt.savefig(FIGURES_DIR / f'temporal_trends.{FIGURE_FORMAT}', dpi=FIGURE_DPI)
-        plt.close()
+        fig.savefig(figures_dir / f'temporal_trends.{FIGURE_FORMAT}', dpi=FIGURE_DPI)
     
-    def _plot_category_distribution(self):
+    def _plot_category_distribution(self, figures_dir: Path):
         """Create and save research category distribution visualization."""
-        plt.figure(figsize=(10, 8))
-        
         # Create stacked bar chart of categories over time
-        category_by_year = self.data.pivot_table(
-            index=self.data['date'].dt.year,
-            columns='research_category',
-            aggfunc='size',
-            fill_value=0
-        )
-        
-        category_by_year.plot(kind='bar', stacked=True)
-        plt.title('Research Categories Distribution Over Time')
-        plt.xlabel('Year')
-        plt.ylabel('Number of Abstracts')
-        plt.legend(title='Research Category', bbox_to_anchor=(1.05, 1))
-        plt.tight_layout()
+        category_by_year = self._category_by_year
+        
+        if FIGURE_FORMAT == 'html':
+            fig = go.Figure([
+                go.Bar(x=category_by_year.index, y=category_by_year[category], name=str(category))
+                for category in category_by_year.columns
+            ])
+            fig.update_layout(
+                barmode='stack',
+                title='Research Categories Distribution Over Time',
+                xaxis_title='Year',
+                yaxis_title='Number of Abstracts',
+                legend_title='Research Category'
+            )
+            fig.write_html(str(figures_dir / 'category_distribution.html'))
+            return
+        
+        fig = Figure(figsize=(10, 8))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        
+        # Stack the bars directly on the axes; pandas' plot() goes through
+        # pyplot, whose lazy backend setup is not safe in worker threads
+        positions = np.arange(len(category_by_year))
+        bottom = np.zeros(len(category_by_year))
+        for category in category_by_year.columns:
+            ax.bar(positions, category_by_year[category], bottom=bottom, label=str(category))
+            bottom += category_by_year[category].to_numpy()
+        ax.set_xticks(positions, category_by_year.index.astype(str))
+        ax.set_title('Research Categories Distribution Over Time')
+        ax.set_xlabel('Year')
+        ax.set_ylabel('Number of Abstracts')
+        ax.legend(title='Research Category', bbox_to_anchor=(1.05, 1))
+        fig.tight_layout()
         
         # Save plot
-        plt.savefig(FIGURES_DIR / f'category_distribution.{FIGURE_FORMAT}', dpi=FIGURE_DPI)
-        plt.close()
+        fig.savefig(figures_dir / f'category_distribution.{FIGURE_FORMAT}', dpi=FIGURE_DPI)
     
-    def _plot_covid_impact(self):
+    def _plot_covid_impact(self, figures_dir: Path):
         """Create and save COVID-19 impact visualization."""
-        plt.figure(figsize=(12, 6))
-        
-        # Create timeline of COVID-related research
-        covid_timeline = self.data.set_index('date')['contains_covid'].rolling('30D').mean()
-        
-        plt.plot(covid_timeline.index, covid_timeline.values)
-        plt.axvline(x=self.covid_date, color='r', linestyle='--', label='COVID-19 Start')
-        plt.title('Timeline of COVID-19 Related Research')
-        plt.xlabel('Date')
-        plt.ylabel('Proportion of COVID-related Abstracts (30-day moving average)')
-        plt.legend()
+        # Create timeline of COVID-related research from daily totals,
+        # so the 30-day window is a fixed-size rolling sum
+        window = self._daily.rolling(30, min_periods=1).sum()
+        covid_timeline = window['sum'] / window['count']
+        
+        if FIGURE_FORMAT == 'html':
+            fig = go.Figure(go.Scatter(x=covid_timeline.index, y=covid_timeline.values, mode='lines'))
+            fig.add_vline(x=self.covid_date, line_color='red', line_dash='dash')
+            fig.update_layout(
+                title='Timeline of COVID-19 Related Research',
+                xaxis_title='Date',
+                yaxis_title='Proportion of COVID-related Abstracts (30-day moving average)'
+            )
+            fig.write_html(str(figures_dir / 'covid_impact.html'))
+            return
+        
+        fig = Figure(figsize=(12, 6))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
+        # One point per day, so rasterize the line in vector formats
+        ax.plot(covid_timeline.index, covid_timeline.values, rasterized=True)
+        ax.axvline(x=self.covid_date, color='r', linestyle='--', label='COVID-19 Start')
+        ax.set_title('Timeline of COVID-19 Related Research')
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Proportion of COVID-related Abstracts (30-day moving average)')
+        ax.legend()
         
         # Save plot
-        plt.savefig(FIGURES_DIR / f'covid_impact.{FIGURE_FORMAT}', dpi=FIGURE_DPI)
-        plt.close()
+        fig.savefig(figures_dir / f'covid_impact.{FIGURE_FORMAT}', dpi=FIGURE_DPI)
     
-    def _plot_geographical_distribution(self):
+    def _plot_geographical_distribution(self, figures_dir: Path):
         """Create and save geographical distribution visualization."""
         # Create world map visualization using plotly
-        geo_counts = self.data['geography'].value_counts()
+        geo_counts = self._geo_counts
         
         fig = go.Figure(data=go.Choropleth(
             locations=geo_counts.index,
@@ -206,15 +380,15 @@ class TrendAnalyzer:
         )
         
         # Save plot
-        fig.write_html(str(FIGURES_DIR / 'geographical_distribution.html'))
+        fig.write_html(str(figures_dir / 'geographical_distribution.html'))
     
-    def _create_interactive_dashboard(self):
+    def _create_interactive_dashboard(self, figures_dir: Path):
         """Create an interactive dashboard using plotly."""
         # Create a combined dashboard
         fig = go.Figure()
         
         # 1. Time series of abstracts
-        yearly_counts = self.data.groupby(self.data['date'].dt.year)['abstract'].count()
+        yearly_counts = self._yearly_counts
         fig.add_trace(go.Scatter(
             x=yearly_counts.index,
             y=yearly_counts.values,
@@ -223,7 +397,7 @@ class TrendAnalyzer:
         ))
         
         # 2. COVID-related research
-        covid_counts = self.data.groupby(self.data['date'].dt.year)['contains_covid'].sum()
+        covid_counts = self._covid_by_year
         fig.add_trace(go.Scatter(
             x=covid_counts.index,
             y=covid_counts.values,
@@ -242,7 +416,7 @@ class TrendAnalyzer:
         )
         
         # Save dashboard
-        fig.write_html(str(FIGURES_DIR / 'interactive_dashboard.html'))
+        fig.write_html(str(figures_dir / 'interactive_dashboard.html'))
     
     def _compare_distributions(self, pre: pd.Series, post: pd.Series) -> Dict:
         """
@@ -255,20 +429,36 @@ class TrendAnalyzer:
         Returns:
             Dict: Dictionary containing comparison results
         """
-        # Calculate proportions
-        pre_props = pre.value_counts(normalize=True)
-        post_props = post.value_counts(normalize=True)
+        # Calculate proportions (an empty period has none, rather than NaN for each category)
+        pre_props = pre.value_counts(normalize=True).dropna()
+        post_props = post.value_counts(normalize=True).dropna()
         
-        # Perform chi-square test
-        chi2, p_value = stats.chi2_contingency(
-            pd.crosstab(pd.concat([pre, post]),
-                       pd.concat([pd.Series(['pre']*len(pre)),
-                                pd.Series(['post']*len(post))]))[:2]
-        
-        return {
+        results = {
             'pre_distribution': pre_props.to_dict(),
             'post_distribution': post_props.to_dict(),
+            'chi2_statistic': np.nan,
+            'p_value': np.nan,
+            'significant_difference': False
+        }
+        
+        # With no values in one period (e.g. a corpus entirely after the COVID
+        # start) its expected frequencies are all zero and there is nothing to test
+        if pre.count() == 0 or post.count() == 0:
+            return results
+        
+        # Count both periods in one crosstab. Only values seen in either period
+        # become rows and both periods are non-empty, so no expected frequency is zero
+        periods = np.repeat(['pre', 'post'], [len(pre), len(post)])
+        labels = pd.concat([pre, post], ignore_index=True).to_numpy(dtype=object)
+        table = pd.crosstab(labels, periods).reindex(columns=['pre', 'post'], fill_value=0)
+        observed = table.to_numpy().T
+        
+        # Perform chi-square test
+        chi2, p_value, _, _ = stats.chi2_contingency(observed)
+        
+        results.update({
             'chi2_statistic': chi2,
             'p_value': p_value,
             'significant_difference': p_value < STATISTICAL_SIGNIFICANCE_LEVEL
-        } 
\ No newline at end of file
+        })
+        return results 
\ No newline at end of file
@@ -25,7 +25,8 @@ DDW_BASE_URL = "https://ddw.org/abstracts/"  # Example URL, replace with actual
 # Model parameters
 GPC4_CONFIG = {
     "model_name": "gpc4-research-assistant",
-    "batch_size": 32,
+    "batch_size": 64,
+    "inference_dtype": "bfloat16",
     "learning_rate": 1e-4,
     "epochs": 100,
     "validation_split": 0.2,
@@ -37,7 +38,7 @@ COVID_START_DATE = "2020-03-01"
 
 # Visualization settings
 FIGURE_DPI = 300
-FIGURE_FORMAT = "png"
+FIGURE_FORMAT = "png"  # "html" renders the static figures client-side with plotly
 COLOR_PALETTE = "viridis"
 
 # Logging configuration
@@ -2,31 +2,85 @@
 Main script for running the DDW research trends analysis pipeline.
 """
 
+import json
 import logging
+import math
 import sys
 from pathlib import Path
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from src.preprocessing.data_processor import DDWDataProcessor
-from src.models.gpc4_model import GPC4ResearchAssistant, load_pretrained_model
 from src.analysis.trend_analyzer import TrendAnalyzer
 from src.config import PROCESSED_DATA_DIR, MODELS_DIR
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('ddw_analysis.log')
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
+def _configure_logging():
+    """Log to stdout and to the pipeline log file."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler('ddw_analysis.log')
+        ]
+    )
+
+def _to_json_compatible(obj):
+    """
+    Convert results to plain Python types the stdlib json encoder accepts.
+    
+    Numpy scalars and arrays become Python values, and NaN or infinite floats
+    become None, matching what orjson writes.
+    
+    Args:
+        obj: Analysis result value
+        
+    Returns:
+        Equivalent value built from dicts, lists, str, int, float, bool and None
+    """
+    if isinstance(obj, dict):
+        return {
+            (key.item() if isinstance(key, np.generic) else key): _to_json_compatible(value)
+            for key, value in obj.items()
+        }
+    if isinstance(obj, (list, tuple, np.ndarray)):
+        return [_to_json_compatible(value) for value in obj]
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    return obj
+
+def save_results(results: dict, output_file: Path):
+    """
+    Save nested analysis results to a JSON file.
+    
+    Args:
+        results (dict): Analysis results keyed by analysis name
+        output_file (Path): Destination JSON file
+    """
+    if orjson is not None:
+        output_file.write_bytes(
+            orjson.dumps(results, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        )
+    else:
+        output_file.write_text(json.dumps(_to_json_compatible(results), allow_nan=False))
+
 def main():
     """Run the complete analysis pipeline."""
+    _configure_logging()
+    
+    # Imported here so the rest of this module does not require torch
+    from src.models.gpc4_model import load_pretrained_model
+    
     try:
         logger.info("Starting DDW research trends analysis pipeline")
         
@@ -70,7 +124,7 @@ def main():
         
         # Save results to JSON
         output_file = PROCESSED_DATA_DIR / f'analysis_results_{datetime.now().strftime("%Y%m%d")}.json'
-        pd.DataFrame(results).to_json(output_file)
+        save_results(results, output_file)
         
         logger.info(f"Analysis complete. Results saved to {output_file}")
         
@@ -6,15 +6,25 @@ This model is designed to process and analyze academic abstracts to identify res
 import torch
 import torch.nn as nn
 from transformers import AutoModel, AutoTokenizer
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Tuple
+import hashlib
 import logging
 import os
 
-from src.config import GPC4_CONFIG
+from src.config import GPC4_CONFIG, PROCESSED_DATA_DIR
 
 logger = logging.getLogger(__name__)
 
 class GPC4ResearchAssistant(nn.Module):
+    # Example trend categories - customize based on your needs
+    TREND_CATEGORIES = [
+        "covid_related",
+        "innovative_methods",
+        "clinical_trials",
+        "technological_advancement",
+        "patient_outcomes"
+    ]
+    
     def __init__(self, model_name: str = GPC4_CONFIG["model_name"]):
         """
         Initialize the GPC-4 Research Assistant model.
@@ -23,6 +33,7 @@ class GPC4ResearchAssistant(nn.Module):
             model_name (str): Name of the pre-trained model to use
         """
         super().__init__()
+        self.model_name = model_name
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.base_model = AutoModel.from_pretrained(model_name)
         
@@ -36,6 +47,10 @@ class GPC4ResearchAssistant(nn.Module):
             nn.Linear(256, 128)
         )
         
+        # Run on the GPU when one is available
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.to(self.device)
+        
     def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
         """
         Forward pass of the model.
@@ -63,16 +78,16 @@ class GPC4ResearchAssistant(nn.Module):
             Dict[str, float]: Dictionary of identified trends and their confidence scores
         """
         self.eval()
-        with torch.no_grad():
+        with torch.inference_mode(), self._autocast():
             inputs = self.tokenizer(abstract_text, 
                                   return_tensors="pt",
                                   truncation=True,
                                   max_length=512,
-                                  padding=True)
+                                  padding=True).to(self.device)
             
             trends = self.forward(inputs["input_ids"], inputs["attention_mask"])
             # Process trends into interpretable format
-            trend_scores = self._process_trends(trends)
+            trend_scores = self._process_trends(trends)[0]
             
         return trend_scores
     
@@ -87,57 +102,119 @@ class GPC4ResearchAssistant(nn.Module):
             List[Dict[str, float]]: List of trend dictionaries for each abstract
         """
         self.eval()
-        results = []
+        results = [None] * len(abstracts)
         batch_size = GPC4_CONFIG["batch_size"]
         
-        for i in range(0, len(abstracts), batch_size):
-            batch = abstracts[i:i + batch_size]
-            batch_results = self._process_batch(batch)
-            results.extend(batch_results)
+        input_ids, lengths = self._tokenize_corpus(abstracts)
+        offsets = torch.cumsum(lengths, dim=0) - lengths
+        
+        # Batch abstracts of similar token length together to minimize padding
+        order = torch.argsort(lengths).tolist()
+        
+        for i in range(0, len(order), batch_size):
+            batch_indices = order[i:i + batch_size]
+            batch_ids, attention_mask = self._pad_batch(input_ids, offsets, lengths, batch_indices)
+            batch_results = self._process_batch(batch_ids, attention_mask)
+            
+            # Restore the original order
+            for idx, result in zip(batch_indices, batch_results):
+                results[idx] = result
             
         return results
     
-    def _process_trends(self, trends: torch.Tensor) -> Dict[str, float]:
+    def _tokenize_corpus(self, abstracts: List[str]) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Tokenize all abstracts once, reusing a cached copy on disk when available.
+        
+        Args:
+            abstracts (List[str]): List of abstract texts to tokenize
+            
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Concatenated token ids and the token length of each abstract
+        """
+        corpus_hash = hashlib.sha1(self.model_name.encode())
+        for abstract in abstracts:
+            corpus_hash.update(abstract.encode())
+            corpus_hash.update(b"\0")
+        cache_file = PROCESSED_DATA_DIR / f"tokens_{corpus_hash.hexdigest()[:16]}.pt"
+        
+        if cache_file.exists():
+            logger.info(f"Loading cached tokens from {cache_file}")
+            cached = torch.load(cache_file)
+            return cached["input_ids"], cached["lengths"]
+        
+        encoded = self.tokenizer(abstracts, truncation=True, max_length=512)["input_ids"]
+        lengths = torch.tensor([len(ids) for ids in encoded], dtype=torch.long)
+        input_ids = torch.tensor([token for ids in encoded for token in ids], dtype=torch.long)
+        
+        torch.save({"input_ids": input_ids, "lengths": lengths}, cache_file)
+        return input_ids, lengths
+    
+    def _pad_batch(self, input_ids: torch.Tensor, offsets: torch.Tensor, lengths: torch.Tensor,
+                   indices: List[int]) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Build a padded batch from the tokenized corpus.
+        
+        Args:
+            input_ids (torch.Tensor): Concatenated token ids for the corpus
+            offsets (torch.Tensor): Start offset of each abstract in input_ids
+            lengths (torch.Tensor): Token length of each abstract
+            indices (List[int]): Abstracts to include in the batch
+            
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Padded input ids and attention mask
+        """
+        max_length = int(lengths[indices].max())
+        pad_token_id = self.tokenizer.pad_token_id or 0
+        batch_ids = torch.full((len(indices), max_length), pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(indices), max_length), dtype=torch.long)
+        
+        for row, idx in enumerate(indices):
+            start, length = int(offsets[idx]), int(lengths[idx])
+            batch_ids[row, :length] = input_ids[start:start + length]
+            attention_mask[row, :length] = 1
+            
+        return batch_ids, attention_mask
+    
+    def _autocast(self) -> torch.autocast:
+        """
+        Create the mixed-precision context used for inference.
+        
+        Returns:
+            torch.autocast: Autocast context for the model's device
+        """
+        dtype = getattr(torch, GPC4_CONFIG["inference_dtype"])
+        return torch.autocast(device_type=self.device.type, dtype=dtype)
+    
+    def _process_trends(self, trends: torch.Tensor) -> List[Dict[str, float]]:
         """
         Process raw trend outputs into interpretable scores.
         
         Args:
-            trends (torch.Tensor): Raw trend outputs from the model
+            trends (torch.Tensor): Raw trend outputs from the model, one row per abstract
             
         Returns:
-            Dict[str, float]: Dictionary of trend categories and their scores
-        """
-        # Example trend categories - customize based on your needs
-        trend_categories = [
-            "covid_related",
-            "innovative_methods",
-            "clinical_trials",
-            "technological_advancement",
-            "patient_outcomes"
-        ]
-        
-        scores = torch.sigmoid(trends[0])  # Convert to probabilities
-        return {cat: float(score) for cat, score in zip(trend_categories, scores)}
+            List[Dict[str, float]]: Trend categories and their scores for each abstract
+        """
+        # Convert the whole batch to probabilities in one transfer
+        n_categories = len(self.TREND_CATEGORIES)
+        probs = torch.sigmoid(trends[:, :n_categories]).float().cpu().numpy()
+        return [dict(zip(self.TREND_CATEGORIES, row.tolist())) for row in probs]
     
-    def _process_batch(self, batch: List[str]) -> List[Dict[str, float]]:
+    def _process_batch(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> List[Dict[str, float]]:
         """
-        Process a batch of abstracts.
+        Process a batch of tokenized abstracts.
         
         Args:
-            batch (List[str]): List of abstracts to process
+            input_ids (torch.Tensor): Padded token ids for the batch
+            attention_mask (torch.Tensor): Attention mask for the batch
             
         Returns:
             List[Dict[str, float]]: Processed results for the batch
         """
-        with torch.no_grad():
-            inputs = self.tokenizer(batch,
-                                  return_tensors="pt",
-                                  truncation=True,
-                                  max_length=512,
-                                  padding=True)
-            
-            trends = self.forward(inputs["input_ids"], inputs["attention_mask"])
-            return [self._process_trends(trend.unsqueeze(0)) for trend in trends]
+        with torch.inference_mode(), self._autocast():
+            trends = self.forward(input_ids.to(self.device), attention_mask.to(self.device))
+            return self._process_trends(trends)
 
 def load_pretrained_model(checkpoint_path: str = None) -> GPC4ResearchAssistant:
     """
@@ -151,6 +228,6 @@ def load_pretrained_model(checkpoint_path: str = None) -> GPC4ResearchAssistant:
     """
     model = GPC4ResearchAssistant()
     if checkpoint_path and os.path.exists(checkpoint_path):
-        model.load_state_dict(torch.load(checkpoint_path))
+        model.load_state_dict(torch.load(checkpoint_path, map_location=model.device))
         logger.info(f"Loaded model from {checkpoint_path}")
     return model 
\ No newline at end of file
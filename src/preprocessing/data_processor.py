@@ -8,11 +8,29 @@ import numpy as np
 from typing import List, Dict, Union, Tuple
 import re
 import logging
+import multiprocessing
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
 import requests
 
+try:
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    ds = None
+    STRING_DTYPE = 'string'
+
+from src.preprocessing.feature_scan import (
+    FAST_SCAN_AVAILABLE,
+    categorize_text,
+    flatten_keywords,
+    scan_features
+)
 from src.config import (
     RAW_DATA_DIR,
     PROCESSED_DATA_DIR,
@@ -22,12 +40,59 @@ from src.config import (
 
 logger = logging.getLogger(__name__)
 
+def _class_xpath(name: str) -> str:
+    """Build an XPath predicate matching elements with a CSS class, as BeautifulSoup's class_ does."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
 class DDWDataProcessor:
+    # Research categories and their keyword patterns, checked in order
+    RESEARCH_CATEGORIES = {
+        'clinical_trial': r'trial|randomized|placebo',
+        'observational': r'cohort|retrospective|prospective',
+        'basic_science': r'vitro|vivo|molecular|cellular',
+        'meta_analysis': r'meta-analysis|systematic review',
+        'case_study': r'case report|case series'
+    }
+    
+    # Declared category domain, in priority order with the fallback last
+    CATEGORY_DTYPE = pd.CategoricalDtype(list(RESEARCH_CATEGORIES) + ['other'])
+    
+    # Fixed text patterns, compiled once at import and shared by all instances
+    _non_word_re = re.compile(r'[^\w\s]')
+    _ws_re = re.compile(r'\s+')
+    _covid_re = re.compile(r'covid|sars-cov-2|coronavirus')
+    
+    # Compiled XPath queries for the abstract listing markup
+    _abstracts_xpath = etree.XPath(f"//div[{_class_xpath('abstract')}]")
+    _field_xpaths = {
+        'title': etree.XPath("string((.//h2)[1])"),
+        'abstract': etree.XPath(f"string((.//div[{_class_xpath('content')}])[1])"),
+        'author': etree.XPath(f"string((.//div[{_class_xpath('author')}])[1])"),
+        'author_affiliation': etree.XPath(f"string((.//div[{_class_xpath('affiliation')}])[1])"),
+        'presentation_date': etree.XPath(f"string((.//div[{_class_xpath('date')}])[1])")
+    }
+    
     def __init__(self):
         """Initialize the DDW data processor."""
         self.raw_data_dir = RAW_DATA_DIR
         self.processed_data_dir = PROCESSED_DATA_DIR
         
+        # Compile the category patterns once per processor
+        self._categories = [
+            (category, re.compile(pattern))
+            for category, pattern in self.RESEARCH_CATEGORIES.items()
+        ]
+        self._category_labels = np.array(list(self.RESEARCH_CATEGORIES) + ['other'])
+        
+        # One alternation with a group per category, so a single scan finds
+        # every category mentioned; group 1 is the highest priority
+        self._category_re = re.compile(
+            '|'.join(f'({pattern})' for pattern in self.RESEARCH_CATEGORIES.values())
+        )
+        self._scan_keywords = self._literal_keywords()
+        if self._scan_keywords is not None:
+            self._flat_category_keywords = flatten_keywords(self._scan_keywords[1])
+        
     def fetch_abstracts(self, year: int) -> pd.DataFrame:
         """
         Fetch abstracts from DDW website for a specific year.
@@ -49,8 +114,9 @@ class DDWDataProcessor:
             response.raise_for_status()
             
             # Parse the HTML and extract abstract information
-            soup = BeautifulSoup(response.text, 'html.parser')
-            abstracts = self._parse_abstracts(soup)
+            # (from the raw bytes, so the text is decoded once by the parser,
+            # in the charset the server declared)
+            abstracts = self._parse_abstracts(response.content, encoding=response.encoding or 'utf-8')
             
             # Convert to DataFrame
             df = pd.DataFrame(abstracts)
@@ -75,26 +141,96 @@ class DDWDataProcessor:
         Returns:
             pd.DataFrame: Processed abstract data
         """
-        # Clean text
-        df['clean_abstract'] = df['abstract'].apply(self._clean_text)
+        # Clean text (vectorized over the whole column). The regexes run on
+        # Python strings because Arrow's regex engine treats \w as ASCII-only.
+        df['abstract'] = df['abstract'].astype(STRING_DTYPE)
+        df['author_affiliation'] = df['author_affiliation'].astype(STRING_DTYPE)
+        df['clean_abstract'] = (
+            df['abstract']
+            .astype('string[python]')
+            .str.lower()
+            .str.replace(self._non_word_re, '', regex=True)
+            .str.replace(self._ws_re, ' ', regex=True)
+            .str.strip()
+            .astype(STRING_DTYPE)
+        )
         
         # Extract features
-        df['word_count'] = df['clean_abstract'].apply(lambda x: len(x.split()))
-        df['contains_covid'] = df['clean_abstract'].apply(
-            lambda x: 1 if re.search(r'covid|sars-cov-2|coronavirus', x.lower()) else 0
-        )
+        if FAST_SCAN_AVAILABLE and self._scan_keywords is not None:
+            # Single compiled pass over the text for all three features
+            covid_keywords, category_keywords = self._scan_keywords
+            contains_covid, category_ids, word_count = scan_features(
+                df['clean_abstract'], covid_keywords, category_keywords
+            )
+            df['word_count'] = word_count
+            df['contains_covid'] = contains_covid
+            df['research_category'] = pd.Categorical.from_codes(category_ids, dtype=self.CATEGORY_DTYPE)
+        else:
+            # Cleaned text has single spaces between words and none at the ends,
+            # so counting spaces avoids building a list of words per row
+            clean = df['clean_abstract']
+            df['word_count'] = (clean.str.count(' ') + (clean.str.len() > 0)).fillna(0).astype('int32')
+            df['contains_covid'] = df['clean_abstract'].str.contains(
+                self._covid_re.pattern, regex=True, na=False
+            ).astype('int8')
+            df['research_category'] = self._categorize_series(df['clean_abstract'])
         
-        # Extract research categories
-        df['research_category'] = df['clean_abstract'].apply(self._categorize_research)
+        # Parse presentation dates once; unparseable dates become NaT
+        df['date'] = pd.to_datetime(df['presentation_date'], format='%Y-%m-%d', cache=True, errors='coerce')
         
         # Extract geographical information
-        df['geography'] = df['author_affiliation'].apply(self._extract_geography)
+        # (a comprehension over these short strings beats the .str accessor)
+        df['geography'] = pd.Series(
+            [
+                affiliation.rsplit(',', 1)[-1].strip() if isinstance(affiliation, str) else affiliation
+                for affiliation in df['author_affiliation'].to_numpy(dtype=object)
+            ],
+            index=df.index,
+            dtype=STRING_DTYPE
+        )
+        
+        # Low-cardinality labels are stored as categoricals for cheap grouping
+        df['research_category'] = df['research_category'].astype(self.CATEGORY_DTYPE)
+        df['geography'] = df['geography'].astype('category')
         
         return df
     
+    def _categorize_series(self, texts: pd.Series) -> np.ndarray:
+        """
+        Categorize a column of cleaned abstracts.
+        
+        Args:
+            texts (pd.Series): Cleaned abstract text
+            
+        Returns:
+            np.ndarray: Research category of each abstract (first matching pattern wins)
+        """
+        masks = [
+            texts.str.contains(pattern.pattern, regex=True, na=False).to_numpy(dtype=bool)
+            for _, pattern in self._categories
+        ]
+        return np.select(masks, self._category_labels[:-1], default='other')
+    
+    def _literal_keywords(self) -> Union[Tuple[List[str], List[List[str]]], None]:
+        """
+        Split the COVID and category patterns into literal keyword lists.
+        
+        Returns:
+            Union[Tuple[List[str], List[List[str]]], None]: COVID keywords and per-category
+            keywords, or None if any pattern is more than an alternation of literals
+        """
+        patterns = [self._covid_re.pattern] + [pattern.pattern for _, pattern in self._categories]
+        if any(re.search(r'[.^$*+?{}\[\]\\()]', pattern) for pattern in patterns):
+            return None
+        
+        return patterns[0].split('|'), [pattern.split('|') for pattern in patterns[1:]]
+    
     def _clean_text(self, text: str) -> str:
         """
-        Clean and normalize text data.
+        Clean and normalize a single text string.
+        
+        process_abstracts cleans whole columns with pandas string methods;
+        this is kept for single-string callers.
         
         Args:
             text (str): Raw text
@@ -106,10 +242,10 @@ class DDWDataProcessor:
         text = text.lower()
         
         # Remove special characters
-        text = re.sub(r'[^\w\s]', '', text)
+        text = self._non_word_re.sub('', text)
         
         # Remove extra whitespace
-        text = ' '.join(text.split())
+        text = self._ws_re.sub(' ', text).strip()
         
         return text
     
@@ -125,19 +261,18 @@ class DDWDataProcessor:
         """
         # Implement logic to categorize research
         # This is a simple example - expand based on your needs
-        categories = {
-            'clinical_trial': r'trial|randomized|placebo',
-            'observational': r'cohort|retrospective|prospective',
-            'basic_science': r'vitro|vivo|molecular|cellular',
-            'meta_analysis': r'meta-analysis|systematic review',
-            'case_study': r'case report|case series'
-        }
+        if FAST_SCAN_AVAILABLE and self._scan_keywords is not None:
+            category_id = categorize_text(abstract.lower(), *self._flat_category_keywords, len(self._categories))
+            return str(self._category_labels[category_id])
         
-        for category, pattern in categories.items():
-            if re.search(pattern, abstract.lower()):
-                return category
+        best = None
+        for match in self._category_re.finditer(abstract.lower()):
+            if best is None or match.lastindex < best:
+                best = match.lastindex
+                if best == 1:
+                    break
                 
-        return 'other'
+        return str(self._category_labels[best - 1]) if best is not None else 'other'
     
     def _extract_geography(self, affiliation: str) -> str:
         """
@@ -151,36 +286,61 @@ class DDWDataProcessor:
         """
         # Implement geography extraction logic
         # This is a placeholder - expand based on your needs
-        return affiliation.split(',')[-1].strip()
+        return affiliation.rsplit(',', 1)[-1].strip()
     
-    def _parse_abstracts(self, soup: BeautifulSoup) -> List[Dict]:
+    def _parse_abstracts(self, page: Union[str, bytes, BeautifulSoup], encoding: str = 'utf-8') -> List[Dict]:
         """
         Parse abstracts from HTML content.
         
         Args:
-            soup (BeautifulSoup): Parsed HTML content
+            page (Union[str, bytes, BeautifulSoup]): HTML content, or an already parsed soup
+            encoding (str): Encoding of bytes content; given explicitly so the parser skips detection
             
         Returns:
             List[Dict]: List of abstract dictionaries
         """
         # Implement parsing logic based on DDW website structure
         # This is a placeholder - actual implementation would depend on site structure
-        abstracts = []
+        if isinstance(page, BeautifulSoup):
+            page = str(page)
+        if isinstance(page, bytes):
+            tree = lxml_html.fromstring(page, parser=lxml_html.HTMLParser(encoding=encoding))
+        else:
+            tree = lxml_html.fromstring(page)
         
         # Example structure - modify based on actual HTML structure
-        abstract_elements = soup.find_all('div', class_='abstract')
-        
-        for element in abstract_elements:
-            abstract = {
-                'title': element.find('h2').text.strip(),
-                'abstract': element.find('div', class_='content').text.strip(),
-                'author': element.find('div', class_='author').text.strip(),
-                'author_affiliation': element.find('div', class_='affiliation').text.strip(),
-                'presentation_date': element.find('div', class_='date').text.strip()
-            }
-            abstracts.append(abstract)
+        return [
+            {field: xpath(element).strip() for field, xpath in self._field_xpaths.items()}
+            for element in self._abstracts_xpath(tree)
+        ]
+    
+    def _set_storage_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cast processed columns to compact dtypes for storage and analysis.
+        
+        Args:
+            df (pd.DataFrame): Processed abstract data
             
-        return abstracts
+        Returns:
+            pd.DataFrame: Data with Arrow string, categorical, datetime and int8 columns
+        """
+        # Parquet reads text back as Python strings, so restore Arrow storage
+        for column in ('abstract', 'clean_abstract', 'author_affiliation'):
+            df[column] = df[column].astype(STRING_DTYPE)
+        
+        # Geography categories differ between years, so re-unify them after concatenation
+        df['research_category'] = df['research_category'].astype(self.CATEGORY_DTYPE)
+        df['geography'] = df['geography'].astype('category')
+        df['contains_covid'] = df['contains_covid'].astype('int8')
+        
+        # Store the dates parsed by process_abstracts as presentation_date itself
+        # rather than keeping two identical datetime columns; malformed dates are NaT
+        if 'date' in df:
+            df['presentation_date'] = df.pop('date')
+        else:
+            df['presentation_date'] = pd.to_datetime(df['presentation_date'], format='%Y-%m-%d', errors='coerce')
+        
+        return df
     
     def process_all_years(self) -> pd.DataFrame:
         """
@@ -189,31 +349,46 @@ class DDWDataProcessor:
         Returns:
             pd.DataFrame: Combined processed data for all years
         """
-        all_data = []
+        # One Hive-style partition per year: abstracts/year=YYYY/data.parquet
+        processed_files = {
+            year: self.processed_data_dir / "abstracts" / f"year={year}" / "data.parquet"
+            for year in YEARS_TO_ANALYZE
+        }
         
-        for year in YEARS_TO_ANALYZE:
-            logger.info(f"Processing year {year}")
+        # Only fetch and process years without a processed file
+        missing_years = [year for year, path in processed_files.items() if not path.exists()]
+        
+        if missing_years:
+            logger.info(f"Processing years {missing_years}")
             
-            # Check if processed file exists
-            processed_file = self.processed_data_dir / f"processed_abstracts_{year}.csv"
+            # Fetching is network-bound, so overlap requests across threads
+            with ThreadPoolExecutor(max_workers=len(missing_years)) as executor:
+                raw_dfs = list(executor.map(self.fetch_abstracts, missing_years))
             
-            if processed_file.exists():
-                df = pd.read_csv(processed_file)
-            else:
-                # Fetch and process new data
-                raw_df = self.fetch_abstracts(year)
-                df = self.process_abstracts(raw_df)
+            # Text processing is CPU-bound, so spread years across processes.
+            # Workers are spawned, not forked, so they never inherit a
+            # half-initialized thread pool (e.g. numba's) from the parent.
+            with ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn')) as executor:
+                processed_dfs = executor.map(self.process_abstracts, raw_dfs)
                 
-                # Save processed data
-                df.to_csv(processed_file, index=False)
-            
-            all_data.append(df)
+                for year, df in zip(missing_years, processed_dfs):
+                    # Save processed data
+                    df = self._set_storage_dtypes(df)
+                    processed_files[year].parent.mkdir(parents=True, exist_ok=True)
+                    df.to_parquet(processed_files[year], index=False)
         
-        # Combine all years
-        combined_df = pd.concat(all_data, ignore_index=True)
+        combined_file = self.processed_data_dir / "all_abstracts_processed.parquet"
+        paths = [str(processed_file) for processed_file in processed_files.values()]
         
-        # Save combined dataset
-        combined_file = self.processed_data_dir / "all_abstracts_processed.csv"
-        combined_df.to_csv(combined_file, index=False)
+        if ds is not None:
+            # Scan the yearly files as one Arrow dataset; the table references
+            # each file's record batches, so there are no per-year DataFrames
+            # to concatenate before the single conversion to pandas
+            table = ds.dataset(paths, format='parquet').to_table()
+            pq.write_table(table, combined_file)
+            combined_df = table.to_pandas()
+        else:
+            combined_df = pd.concat((pd.read_parquet(path) for path in paths), ignore_index=True)
+            combined_df.to_parquet(combined_file, index=False)
         
-        return combined_df 
\ No newline at end of file
+        return self._set_storage_dtypes(combined_df)
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Single-pass feature extraction for cleaned abstracts.
+Computes the COVID flag, research category and word count in one scan over
+the UTF-8 bytes of each abstract, and categorizes single strings with a
+compiled keyword search. These need numba and pyarrow; without them
+FAST_SCAN_AVAILABLE is False and callers use pandas string methods and regexes.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+
+try:
+    import numba
+    import pyarrow as pa
+    from numba import prange
+    FAST_SCAN_AVAILABLE = True
+except ImportError:
+    prange = range
+    FAST_SCAN_AVAILABLE = False
+
+
+def _scan_kernel(buf: np.ndarray, offsets: np.ndarray, pat_buf: np.ndarray,
+                 pat_offsets: np.ndarray, pat_group: np.ndarray,
+                 n_categories: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Scan each text once, matching all keywords and counting words.
+
+    Args:
+        buf (np.ndarray): Concatenated UTF-8 bytes of all texts
+        offsets (np.ndarray): Start offset of each text in buf, plus the end offset
+        pat_buf (np.ndarray): Concatenated UTF-8 bytes of all keywords
+        pat_offsets (np.ndarray): Start offset of each keyword in pat_buf, plus the end offset
+        pat_group (np.ndarray): Category id of each keyword, or -1 for COVID keywords
+        n_categories (int): Number of categories; used as the id for 'other'
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: COVID flags, category ids and word counts
+    """
+    n_texts = len(offsets) - 1
+    covid = np.zeros(n_texts, dtype=np.int8)
+    category = np.full(n_texts, n_categories, dtype=np.int8)
+    word_count = np.zeros(n_texts, dtype=np.int32)
+
+    for row in prange(n_texts):
+        start, end = offsets[row], offsets[row + 1]
+        found_covid = False
+        best = n_categories
+        words = 0
+        in_word = False
+
+        for pos in range(start, end):
+            # Words are separated by ASCII whitespace
+            byte = buf[pos]
+            if byte == 32 or 9 <= byte <= 13:
+                in_word = False
+            elif not in_word:
+                in_word = True
+                words += 1
+
+            for pat in range(len(pat_group)):
+                group = pat_group[pat]
+
+                # Skip keywords that can no longer change the result
+                if (group < 0 and found_covid) or (group >= 0 and group >= best):
+                    continue
+
+                pat_start, pat_end = pat_offsets[pat], pat_offsets[pat + 1]
+                if pos + pat_end - pat_start > end:
+                    continue
+
+                matched = True
+                for k in range(pat_end - pat_start):
+                    if buf[pos + k] != pat_buf[pat_start + k]:
+                        matched = False
+                        break
+
+                if matched:
+                    if group < 0:
+                        found_covid = True
+                    else:
+                        best = group
+
+        covid[row] = found_covid
+        category[row] = best
+        word_count[row] = words
+
+    return covid, category, word_count
+
+
+def _categorize_kernel(text: str, keywords: Tuple[str, ...], groups: np.ndarray,
+                       n_categories: int) -> int:
+    """
+    Find the highest-priority category with a keyword in a single text.
+    
+    Args:
+        text (str): Lowercased text
+        keywords (Tuple[str, ...]): Literal keywords of all categories
+        groups (np.ndarray): Category id of each keyword
+        n_categories (int): Number of categories; used as the id for 'other'
+        
+    Returns:
+        int: Category id of the best match
+    """
+    best = n_categories
+    for i in range(len(keywords)):
+        if groups[i] < best and text.find(keywords[i]) >= 0:
+            best = groups[i]
+    return best
+
+
+if FAST_SCAN_AVAILABLE:
+    _scan_kernel = numba.njit(parallel=True, cache=True)(_scan_kernel)
+    _categorize_kernel = numba.njit(cache=True)(_categorize_kernel)
+
+
+def _utf8_buffer(texts: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenate encoded strings into a byte buffer with offsets.
+
+    Args:
+        texts (List[bytes]): UTF-8 encoded strings
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Byte buffer and offsets
+    """
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(text) for text in texts])
+    buf = np.frombuffer(b''.join(texts), dtype=np.uint8)
+    return buf, offsets
+
+
+def _arrow_buffer(texts: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the UTF-8 byte buffer and offsets of a string column from Arrow.
+
+    Args:
+        texts (pd.Series): String column; missing values are treated as empty
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Byte buffer and offsets
+    """
+    arr = pa.array(texts.fillna(''))
+    if isinstance(arr, pa.ChunkedArray):
+        arr = arr.combine_chunks()
+    arr = arr.cast(pa.large_string())
+
+    _, offsets, data = arr.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int64)[arr.offset:arr.offset + len(arr) + 1]
+    buf = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(0, dtype=np.uint8)
+    return buf, offsets
+
+
+def scan_features(texts: pd.Series, covid_keywords: List[str],
+                  category_keywords: List[List[str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Extract COVID flags, category ids and word counts in a single pass.
+
+    Args:
+        texts (pd.Series): Cleaned abstract text
+        covid_keywords (List[str]): Literal keywords marking COVID-related abstracts
+        category_keywords (List[List[str]]): Literal keywords for each category, in priority order
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: COVID flags (int8), category ids (int8,
+        len(category_keywords) for no match) and word counts (int32)
+    """
+    buf, offsets = _arrow_buffer(texts)
+
+    keywords = [(keyword, -1) for keyword in covid_keywords]
+    keywords += [(keyword, group) for group, group_keywords in enumerate(category_keywords)
+                 for keyword in group_keywords]
+    pat_buf, pat_offsets = _utf8_buffer([keyword.encode() for keyword, _ in keywords])
+    pat_group = np.array([group for _, group in keywords], dtype=np.int64)
+
+    return _scan_kernel(buf, offsets, pat_buf, pat_offsets, pat_group, len(category_keywords))
+
+
+def flatten_keywords(category_keywords: List[List[str]]) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """
+    Flatten per-category keywords for categorize_text.
+    
+    Args:
+        category_keywords (List[List[str]]): Literal keywords for each category, in priority order
+        
+    Returns:
+        Tuple[Tuple[str, ...], np.ndarray]: All keywords and the category id of each
+    """
+    keywords = tuple(keyword for group_keywords in category_keywords for keyword in group_keywords)
+    groups = np.array([group for group, group_keywords in enumerate(category_keywords)
+                       for _ in group_keywords], dtype=np.int64)
+    return keywords, groups
+
+
+def categorize_text(text: str, keywords: Tuple[str, ...], groups: np.ndarray, n_categories: int) -> int:
+    """
+    Categorize a single lowercased text.
+    
+    Args:
+        text (str): Lowercased text
+        keywords (Tuple[str, ...]): Keywords from flatten_keywords
+        groups (np.ndarray): Category ids from flatten_keywords
+        n_categories (int): Number of categories; returned when nothing matches
+        
+    Returns:
+        int: Category id of the highest-priority match
+    """
+    return int(_categorize_kernel(text, keywords, groups, n_categories))
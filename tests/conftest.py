@@ -55,9 +55,9 @@ def sample_processed_data(sample_raw_data):
     # Add processed columns
     df['clean_abstract'] = df['abstract'].str.lower()
     df['word_count'] = df['abstract'].str.split().str.len()
-    df['contains_covid'] = df['abstract'].str.contains('covid', case=False).astype(int)
+    df['contains_covid'] = df['abstract'].str.contains('covid', case=False).astype('int8')
     df['research_category'] = ['clinical_trial', 'observational', 'basic_science']
-    df['geography'] = df['author_affiliation'].str.split(',').str[-1].str.strip()
+    df['geography'] = [affiliation.rsplit(',', 1)[-1].strip() for affiliation in df['author_affiliation']]
     
     return df
 
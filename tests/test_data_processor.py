@@ -7,19 +7,21 @@ import pandas as pd
 from pathlib import Path
 from bs4 import BeautifulSoup
 from src.preprocessing.data_processor import DDWDataProcessor
+import src.preprocessing.data_processor as data_processor
 
 @pytest.fixture
 def sample_data():
     """Create sample data for testing."""
     return pd.DataFrame({
-        'title': ['Sample Abstract 1', 'Sample Abstract 2'],
+        'title': ['Sample Abstract 1', 'Sample Abstract 2', 'Sample Abstract 3'],
         'abstract': [
             'A clinical trial study about COVID-19 treatment',
-            'An observational study about patient outcomes'
+            'An observational study about patient outcomes',
+            'Étude rétrospective: Crohn’s disease in a Zürich cohort'
         ],
-        'author': ['John Doe', 'Jane Smith'],
-        'author_affiliation': ['Stanford University, USA', 'Oxford University, UK'],
-        'presentation_date': ['2020-05-01', '2019-06-01']
+        'author': ['John Doe', 'Jane Smith', 'Anna Meier'],
+        'author_affiliation': ['Stanford University, USA', 'Oxford University, UK', 'ETH Zürich, Switzerland'],
+        'presentation_date': ['2020-05-01', '2019-06-01', '2021-05-22']
     })
 
 @pytest.fixture
@@ -34,8 +36,13 @@ def test_clean_text(processor):
     assert cleaned == "this is a test with special chars"
     assert cleaned.islower()
 
-def test_categorize_research(processor):
+@pytest.mark.parametrize('fast_scan', [True, False])
+def test_categorize_research(processor, fast_scan, monkeypatch):
     """Test research categorization."""
+    if fast_scan and not data_processor.FAST_SCAN_AVAILABLE:
+        pytest.skip('numba and pyarrow are required for the compiled path')
+    monkeypatch.setattr(data_processor, 'FAST_SCAN_AVAILABLE', fast_scan)
+    
     clinical_trial = "This is a randomized controlled trial"
     observational = "A retrospective cohort study"
     basic_science = "In vitro examination of cells"
@@ -43,6 +50,16 @@ def test_categorize_research(processor):
     assert processor._categorize_research(clinical_trial) == "clinical_trial"
     assert processor._categorize_research(observational) == "observational"
     assert processor._categorize_research(basic_science) == "basic_science"
+    
+    # Category priority wins over position in the text
+    mixed = "A retrospective cohort nested in a randomized trial"
+    assert processor._categorize_research(mixed) == "clinical_trial"
+    assert processor._categorize_research("No keywords here") == "other"
+    
+    # The column path agrees with the single-string path
+    texts = [clinical_trial, observational, basic_science, mixed, "No keywords here"]
+    expected = [processor._categorize_research(text) for text in texts]
+    assert processor._categorize_series(pd.Series(texts).str.lower()).tolist() == expected
 
 def test_extract_geography(processor):
     """Test geography extraction."""
@@ -61,14 +78,36 @@ def test_process_abstracts(processor, sample_data):
     ]
     assert all(col in processed_df.columns for col in expected_columns)
     
+    # Check vectorized cleaning matches the single-string cleaner
+    for raw, clean in zip(processed_df['abstract'], processed_df['clean_abstract']):
+        assert clean == processor._clean_text(raw)
+    
     # Check COVID detection
     assert processed_df.loc[0, 'contains_covid'] == 1
     assert processed_df.loc[1, 'contains_covid'] == 0
     
+    # Check vectorized categorization matches the single-string categorizer
+    for clean, category in zip(processed_df['clean_abstract'], processed_df['research_category']):
+        assert category == processor._categorize_research(clean)
+    assert processed_df.loc[0, 'research_category'] == 'clinical_trial'
+    
+    # Check vectorized geography extraction
+    assert processed_df['geography'].tolist() == ['USA', 'UK', 'Switzerland']
+    
+    # Check non-ASCII text keeps its letters through vectorized cleaning
+    assert processed_df.loc[2, 'clean_abstract'] == 'étude rétrospective crohns disease in a zürich cohort'
+    assert processed_df.loc[2, 'research_category'] == 'observational'
+    assert processed_df['research_category'].dtype == DDWDataProcessor.CATEGORY_DTYPE
+    assert processed_df['geography'].dtype == 'category'
+    
+    # Check dates are parsed once during processing
+    assert processed_df['date'].tolist() == pd.to_datetime(sample_data['presentation_date']).tolist()
+    
     # Check word count calculation
     assert processed_df['word_count'].all() > 0
 
-def test_parse_abstracts(processor):
+@pytest.mark.parametrize('parser', [None, 'lxml', 'html.parser'])
+def test_parse_abstracts(processor, parser):
     """Test HTML parsing functionality."""
     # Create a sample HTML structure
     html = """
@@ -79,10 +118,95 @@ def test_parse_abstracts(processor):
         <div class="affiliation">University, Country</div>
         <div class="date">2023-01-01</div>
     </div>
+    <div class="abstract poster">
+        <h2>Second <em>Title</em></h2>
+        <div class="content">More content</div>
+        <div class="author">Other Author</div>
+        <div class="affiliation">Clinic, Japan</div>
+        <div class="date">2023-05-07</div>
+    </div>
     """
-    soup = BeautifulSoup(html, 'html.parser')
-    abstracts = processor._parse_abstracts(soup)
+    # Raw HTML is what fetch_abstracts passes; parsed soups are still accepted
+    page = html if parser is None else BeautifulSoup(html, parser)
+    abstracts = processor._parse_abstracts(page)
     
-    assert len(abstracts) == 1
+    assert len(abstracts) == 2
     assert abstracts[0]['title'] == "Sample Title"
-    assert abstracts[0]['abstract'] == "Abstract content" 
\ No newline at end of file
+    assert abstracts[0]['abstract'] == "Abstract content" 
+    assert abstracts[1] == {
+        'title': "Second Title",
+        'abstract': "More content",
+        'author': "Other Author",
+        'author_affiliation': "Clinic, Japan",
+        'presentation_date': "2023-05-07"
+    }
+
+def test_parse_abstracts_from_bytes(processor):
+    """Test parsing undecoded UTF-8 page content."""
+    html = """
+    <div class="abstract">
+        <h2>Étude rétrospective</h2>
+        <div class="content">Crohn’s disease cohort</div>
+        <div class="author">Anna Meier</div>
+        <div class="affiliation">ETH Zürich, Switzerland</div>
+        <div class="date">2021-05-22</div>
+    </div>
+    """
+    abstracts = processor._parse_abstracts(html.encode('utf-8'))
+    
+    assert abstracts[0]['title'] == "Étude rétrospective"
+    assert abstracts[0]['abstract'] == "Crohn’s disease cohort"
+    assert abstracts[0]['author_affiliation'] == "ETH Zürich, Switzerland"
+
+def test_fetch_abstracts_uses_declared_encoding(processor, tmp_path, monkeypatch):
+    """Test fetched pages are decoded with the charset the server declares."""
+    html = """
+    <div class="abstract">
+        <h2>Étude</h2>
+        <div class="content">Content</div>
+        <div class="author">Author</div>
+        <div class="affiliation">ETH Zürich, Switzerland</div>
+        <div class="date">2021-05-22</div>
+    </div>
+    """
+    
+    class Response:
+        content = html.encode('iso-8859-1')
+        encoding = 'ISO-8859-1'
+        
+        def raise_for_status(self):
+            pass
+    
+    monkeypatch.setattr(data_processor.requests, 'get', lambda url: Response())
+    monkeypatch.setattr(processor, 'raw_data_dir', tmp_path)
+    df = processor.fetch_abstracts(2021)
+    
+    assert df.loc[0, 'title'] == "Étude"
+    assert df.loc[0, 'author_affiliation'] == "ETH Zürich, Switzerland"
+
+def test_process_all_years(processor, sample_data, tmp_path, monkeypatch):
+    """Test combined processing and Parquet persistence."""
+    monkeypatch.setattr(data_processor, 'YEARS_TO_ANALYZE', [2019, 2020])
+    monkeypatch.setattr(processor, 'processed_data_dir', tmp_path)
+    raw_data = sample_data.copy()
+    raw_data.loc[1, 'presentation_date'] = 'TBD'
+    monkeypatch.setattr(DDWDataProcessor, 'fetch_abstracts', lambda self, year: raw_data.copy())
+    
+    # Process in this process first, so any worker threads are already running
+    # when process_all_years starts its process pool
+    processor.process_abstracts(sample_data.copy())
+    combined_df = processor.process_all_years()
+    
+    assert len(combined_df) == 2 * len(sample_data)
+    assert (tmp_path / 'abstracts' / 'year=2019' / 'data.parquet').exists()
+    assert (tmp_path / 'all_abstracts_processed.parquet').exists()
+    assert combined_df['research_category'].dtype == DDWDataProcessor.CATEGORY_DTYPE
+    assert combined_df['geography'].dtype == 'category'
+    assert combined_df['contains_covid'].dtype == 'int8'
+    for column in ('abstract', 'clean_abstract', 'author_affiliation'):
+        assert combined_df[column].dtype == data_processor.STRING_DTYPE
+    assert pd.api.types.is_datetime64_any_dtype(combined_df['presentation_date'])
+    
+    # Malformed dates become NaT, stored once in presentation_date
+    assert combined_df['presentation_date'].isna().sum() == 2
+    assert 'date' not in combined_df.columns
@@ -0,0 +1,49 @@
+"""
+Tests for the single-pass feature scan.
+"""
+
+import pytest
+import pandas as pd
+from src.config import RAW_DATA_DIR
+from src.preprocessing.data_processor import DDWDataProcessor
+import src.preprocessing.data_processor as data_processor
+
+pytest.importorskip('numba')
+
+EDGE_CASES = pd.DataFrame({
+    'abstract': [
+        'A randomized trial of a COVID-19 vaccine',
+        'Case series: cohort of in vitro cells',
+        '',
+        'Ünïcode   résumé with\ttabs',
+        'Étude rétrospective: a Zürich cohort'
+    ],
+    'author_affiliation': ['A, USA', 'B, UK', 'C, Japan', 'D, France', 'E, France'],
+    'presentation_date': ['2021-05-01'] * 5
+})
+
+@pytest.fixture
+def raw_data():
+    """Load the sample abstracts plus a few edge cases."""
+    df = pd.read_csv(RAW_DATA_DIR / 'sample_abstract_2023.csv')
+    return pd.concat([df, EDGE_CASES], ignore_index=True)
+
+def test_scan_edge_cases():
+    """Test the compiled scan on known inputs."""
+    processed_df = DDWDataProcessor().process_abstracts(EDGE_CASES.copy())
+
+    assert processed_df['word_count'].tolist() == [7, 7, 0, 4, 5]
+    assert processed_df['contains_covid'].tolist() == [1, 0, 0, 0, 0]
+    assert processed_df['research_category'].tolist() == [
+        'clinical_trial', 'observational', 'other', 'other', 'observational'
+    ]
+
+def test_scan_matches_pandas_path(raw_data, monkeypatch):
+    """Test the compiled scan agrees with the pandas string path."""
+    scanned = DDWDataProcessor().process_abstracts(raw_data.copy())
+
+    monkeypatch.setattr(data_processor, 'FAST_SCAN_AVAILABLE', False)
+    expected = DDWDataProcessor().process_abstracts(raw_data.copy())
+
+    for column in ('word_count', 'contains_covid', 'research_category'):
+        assert scanned[column].tolist() == expected[column].tolist()
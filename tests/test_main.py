@@ -0,0 +1,85 @@
+"""
+Tests for saving pipeline results.
+"""
+
+import json
+import pytest
+import numpy as np
+import src.main as main
+from src.analysis.trend_analyzer import TrendAnalyzer
+from src.preprocessing.data_processor import DDWDataProcessor
+
+RESULTS = {
+    'temporal_trends': {
+        'year': {0: np.int64(2019), 1: np.int64(2020)},
+        'yoy_change': {0: float('nan'), 1: np.float64(0.5)}
+    },
+    'covid_impact': {
+        'pre_covid_count': 10,
+        'covid_related_percentage': np.float64(12.5),
+        'significant_difference': np.bool_(False)
+    },
+    'geographical_distribution': {
+        'temporal_changes': {'USA': {2019: np.float64(3.0), 2020: np.nan}},
+        'counts': np.array([1, 2])
+    }
+}
+
+EXPECTED = {
+    'temporal_trends': {
+        'year': {'0': 2019, '1': 2020},
+        'yoy_change': {'0': None, '1': 0.5}
+    },
+    'covid_impact': {
+        'pre_covid_count': 10,
+        'covid_related_percentage': 12.5,
+        'significant_difference': False
+    },
+    'geographical_distribution': {
+        'temporal_changes': {'USA': {'2019': 3.0, '2020': None}},
+        'counts': [1, 2]
+    }
+}
+
+def _load_strict(path):
+    """Load JSON, rejecting the non-standard NaN/Infinity literals."""
+    def reject(constant):
+        raise ValueError(f"invalid JSON constant {constant}")
+    return json.loads(path.read_text(), parse_constant=reject)
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_save_results(tmp_path, monkeypatch, use_orjson):
+    """Test both encoders write the same valid JSON."""
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(main, 'orjson', None)
+    
+    output_file = tmp_path / 'results.json'
+    main.save_results(RESULTS, output_file)
+    
+    assert _load_strict(output_file) == EXPECTED
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_save_analyzer_results(sample_raw_data, tmp_path, monkeypatch, use_orjson):
+    """Test real analyzer output can be saved by both encoders."""
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(main, 'orjson', None)
+    
+    processed = DDWDataProcessor().process_abstracts(sample_raw_data.copy())
+    analyzer = TrendAnalyzer(processed)
+    results = {
+        'temporal_trends': analyzer.analyze_temporal_trends(),
+        'covid_impact': analyzer.analyze_covid_impact(),
+        'geographical_distribution': analyzer.analyze_geographical_distribution()
+    }
+    
+    output_file = tmp_path / 'results.json'
+    main.save_results(results, output_file)
+    saved = _load_strict(output_file)
+    
+    assert saved['geographical_distribution']['temporal_changes']['USA'] == {
+        '2019': None, '2020': None, '2021': 1.0
+    }
@@ -5,7 +5,7 @@ Tests for the trend analyzer module.
 import pytest
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from scipy import stats
 from src.analysis.trend_analyzer import TrendAnalyzer
 from src.config import COVID_START_DATE
 
@@ -14,20 +14,25 @@ def sample_data():
     """Create sample data for testing."""
     dates = pd.date_range(start='2019-01-01', end='2021-12-31', freq='M')
     n_samples = len(dates)
+    covid_start = pd.Timestamp(COVID_START_DATE)
+    
+    # Draw integer category codes from a seeded generator
+    rng = np.random.default_rng(0)
+    categories = ['clinical_trial', 'observational', 'basic_science']
+    countries = ['USA', 'UK', 'China', 'Germany']
     
     return pd.DataFrame({
         'date': dates,
         'presentation_date': dates.strftime('%Y-%m-%d'),
         'abstract': [f'Abstract {i}' for i in range(n_samples)],
-        'contains_covid': [1 if d >= datetime.strptime(COVID_START_DATE, '%Y-%m-%d') else 0 
-                         for d in dates],
-        'research_category': np.random.choice(
-            ['clinical_trial', 'observational', 'basic_science'],
-            size=n_samples
+        'contains_covid': (dates >= covid_start).astype('int8'),
+        'research_category': pd.Categorical.from_codes(
+            rng.integers(0, len(categories), size=n_samples, dtype=np.int8),
+            categories=categories
         ),
-        'geography': np.random.choice(
-            ['USA', 'UK', 'China', 'Germany'],
-            size=n_samples
+        'geography': pd.Categorical.from_codes(
+            rng.integers(0, len(countries), size=n_samples, dtype=np.int8),
+            categories=countries
         )
     })
 
@@ -36,6 +41,29 @@ def analyzer(sample_data):
     """Create a TrendAnalyzer instance with sample data."""
     return TrendAnalyzer(sample_data)
 
+def test_init_handles_missing_dates(sample_data):
+    """Test that missing dates are tolerated and the input frame is untouched."""
+    sample_data.loc[0, ['date', 'presentation_date']] = [pd.NaT, None]
+    original_dtypes = sample_data.dtypes.copy()
+    
+    analyzer = TrendAnalyzer(sample_data)
+    trends = analyzer.analyze_temporal_trends()
+    
+    assert len(analyzer.data) == len(sample_data) - 1
+    assert analyzer.data['year'].dtype == 'int16'
+    assert sum(trends['abstract'].values()) == len(sample_data) - 1
+    assert sample_data.dtypes.equals(original_dtypes)
+    assert 'year' not in sample_data.columns
+
+def test_init_stores_compact_covid_flag(sample_data):
+    """Test that the COVID flag is stored as int8 without changing yearly sums."""
+    sample_data['contains_covid'] = sample_data['contains_covid'].astype('int64')
+    analyzer = TrendAnalyzer(sample_data)
+    trends = analyzer.analyze_temporal_trends()
+    
+    assert analyzer.data['contains_covid'].dtype == 'int8'
+    assert sum(trends['contains_covid'].values()) == sample_data['contains_covid'].sum()
+
 def test_analyze_temporal_trends(analyzer):
     """Test temporal trends analysis."""
     trends = analyzer.analyze_temporal_trends()
@@ -45,6 +73,19 @@ def test_analyze_temporal_trends(analyzer):
     assert 'research_category' in trends
     assert 'geography' in trends
     assert 'yoy_change' in trends
+    
+    # Per-year distributions list only the values present that year
+    for row, year in trends['year'].items():
+        year_data = analyzer.data[analyzer.data['year'] == year]
+        expected = year_data['geography'].value_counts()
+        assert trends['geography'][row] == expected[expected > 0].to_dict()
+
+def test_temporal_trends_omit_absent_values(sample_data):
+    """Test that per-year distributions skip values absent from that year."""
+    sample_data['geography'] = np.where(sample_data['date'].dt.year == 2019, 'USA', 'UK')
+    trends = TrendAnalyzer(sample_data).analyze_temporal_trends()
+    
+    assert trends['geography'] == {0: {'USA': 12}, 1: {'UK': 12}, 2: {'UK': 12}}
 
 def test_analyze_covid_impact(analyzer):
     """Test COVID-19 impact analysis."""
@@ -58,6 +99,10 @@ def test_analyze_covid_impact(analyzer):
     # Verify that pre and post counts sum to total
     total_count = len(analyzer.data)
     assert impact['pre_covid_count'] + impact['post_covid_count'] == total_count
+    
+    # Verify the daily totals give the same percentage as the raw rows
+    post_covid = analyzer.data[analyzer.data['date'] >= analyzer.covid_date]
+    assert impact['covid_related_percentage'] == pytest.approx(post_covid['contains_covid'].mean() * 100)
 
 def test_analyze_geographical_distribution(analyzer):
     """Test geographical distribution analysis."""
@@ -69,6 +114,16 @@ def test_analyze_geographical_distribution(analyzer):
     # Check if all countries are present in distribution
     countries = set(analyzer.data['geography'].unique())
     assert all(country in geo_dist['overall_distribution'] for country in countries)
+    expected = analyzer.data['geography'].value_counts()
+    assert geo_dist['overall_distribution'] == expected[expected > 0].to_dict()
+
+def test_geographical_distribution_omits_unused_categories(sample_data):
+    """Test that categories absent from the data are not reported with zero counts."""
+    usa_uk = sample_data[sample_data['geography'].isin(['USA', 'UK'])]
+    geo_dist = TrendAnalyzer(usa_uk).analyze_geographical_distribution()
+    
+    assert set(geo_dist['overall_distribution']) == {'USA', 'UK'}
+    assert all(count > 0 for count in geo_dist['overall_distribution'].values())
 
 def test_compare_distributions(analyzer):
     """Test distribution comparison functionality."""
@@ -86,29 +141,45 @@ def test_compare_distributions(analyzer):
     # Check if proportions sum to 1
     assert abs(sum(comparison['pre_distribution'].values()) - 1.0) < 1e-10
     assert abs(sum(comparison['post_distribution'].values()) - 1.0) < 1e-10
+    
+    # Check the chi-square test runs on the pre/post count table
+    expected_chi2 = stats.chi2_contingency([[2, 1, 1], [1, 3, 0]])[0]
+    assert comparison['chi2_statistic'] == pytest.approx(expected_chi2)
+
+def test_covid_impact_with_empty_period(sample_data):
+    """Test a corpus entirely after the COVID start has no chi-square result."""
+    post_only = sample_data[sample_data['date'] >= pd.Timestamp(COVID_START_DATE)]
+    impact = TrendAnalyzer(post_only).analyze_covid_impact()
+    
+    assert impact['pre_covid_count'] == 0
+    assert impact['category_changes']['pre_distribution'] == {}
+    assert np.isnan(impact['category_changes']['chi2_statistic'])
+    assert np.isnan(impact['category_changes']['p_value'])
+    assert impact['category_changes']['significant_difference'] is False
 
 def test_visualization_creation(analyzer, tmp_path):
     """Test visualization creation."""
-    # Temporarily set the figures directory to a test directory
-    import src.config as config
-    original_figures_dir = config.FIGURES_DIR
-    config.FIGURES_DIR = tmp_path
-    
-    try:
-        analyzer.create_visualizations()
-        
-        # Check if visualization files were created
-        expected_files = [
-            'temporal_trends.png',
-            'category_distribution.png',
-            'covid_impact.png',
-            'geographical_distribution.html',
-            'interactive_dashboard.html'
-        ]
-        
-        for file in expected_files:
-            assert (tmp_path / file).exists()
-    
-    finally:
-        # Restore original figures directory
-        config.FIGURES_DIR = original_figures_dir 
\ No newline at end of file
+    analyzer.create_visualizations(figures_dir=tmp_path)
+    
+    # Check if visualization files were created
+    expected_files = [
+        'temporal_trends.png',
+        'category_distribution.png',
+        'covid_impact.png',
+        'geographical_distribution.html',
+        'interactive_dashboard.html'
+    ]
+    
+    for file in expected_files:
+        assert (tmp_path / file).exists()
+
+def test_html_visualization_creation(analyzer, tmp_path, monkeypatch):
+    """Test client-side rendering of the static figures."""
+    import src.analysis.trend_analyzer as trend_analyzer
+    monkeypatch.setattr(trend_analyzer, 'FIGURE_FORMAT', 'html')
+    
+    analyzer.create_visualizations(figures_dir=tmp_path)
+    
+    for name in ('temporal_trends', 'category_distribution', 'covid_impact'):
+        assert (tmp_path / f'{name}.html').exists()
+        assert not (tmp_path / f'{name}.png').exists()